@@ -13,6 +13,16 @@ ANVIL_RICH_PRIVATE_KEY: str = (
     "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
 )
 
+# Balance (wei, hex) set for every wallet found in the ecosystem configs
+ANVIL_WALLET_BALANCE: str = hex(100 * 10**18)
+
+# Rich wallets funded on Anvil and their balance (wei, hex)
+ANVIL_RICH_WALLETS: tuple[str, ...] = (
+    "0xa61464658afeaf65cccaafd3a512b69a83b77618",
+    "0x36615cf349d7f6344891b1e7ca7c72883f5dc049",
+)
+ANVIL_RICH_WALLET_BALANCE: str = hex(9000 * 10**18)
+
 # Default gateway chain ID
 GATEWAY_CHAIN_ID: str = "506"
 
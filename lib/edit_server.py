@@ -1,9 +1,49 @@
 import re
 from pathlib import Path
-import yaml
+from typing import Iterable, Mapping, Optional
 from . import utils
 
 
+# Regex explanation:
+#
+# (?m)               - multiline mode (^ and $ match per line)
+# ^\s*               - optional leading spaces at the start of the line
+# pub\s+const\s+     - `pub const` with flexible spaces
+# (?P<name>\w+)      - the constant name (callers filter on it)
+# \s*:\s*&'?static?\s*str
+#   or \s*:\s*&str   - we allow `&str` or `&'static str`
+# \s*=\s*"           - `= "`
+# (?P<value>[^"]*)   - the old value (anything up to the closing quote)
+# ";                 - closing quote and semicolon
+_RUST_CONST_RE = re.compile(
+    r"""(?m)
+        ^
+        (?P<prefix>\s*pub\s+const\s+(?P<name>\w+)\s*:\s*&(?:'static\s*)?str\s*=\s*")
+        (?P<value>[^"]*)
+        (?P<suffix>"\s*;)
+        """,
+    re.VERBOSE,
+)
+
+# Matches a two-line `const V{N}_VK_HASH: &'static str =\n    "0x...";` block
+_VK_HASH_CONST_RE = re.compile(
+    r"""
+    (?P<prefix>^[ \t]*const\s+V(?P<version>\d+)_VK_HASH\s*:\s*&'static\s*str\s*=\s*\n[ \t]*")
+    (?P<hash>[^"]*)
+    (?P<suffix>"\s*;)
+    """,
+    re.VERBOSE | re.MULTILINE,
+)
+
+# New V{N}_VK_HASH constant, in the same layout `_VK_HASH_CONST_RE` matches
+_VK_HASH_CONST_TEMPLATE = (
+    '    const V{version}_VK_HASH: &\'static str =\n        "{vk_hash}";'
+)
+
+# contracts.yaml addresses that `update_chain_config_yaml` writes into a chain config
+CHAIN_CONFIG_CONTRACTS = ("bridgehub_proxy_addr", "l1_bytecodes_supplier_addr")
+
+
 def update_rust_const(
     file: Path | str,
     const_name: str,
@@ -30,49 +70,56 @@ def update_rust_const(
         New string literal content (WITHOUT surrounding quotes), e.g.
         "0xabc123...".
     """
+    update_rust_consts(file, {const_name: new_value})
+
+
+def update_rust_consts(
+    file: Path | str,
+    updates: Mapping[str, str],
+) -> None:
+    """
+    Update several Rust `&str` constants in a file with a single read,
+    a single regex pass and a single write.
+
+    See `update_rust_const` for the expected constant format. If any of the
+    constants cannot be found, the script fails and the file is left as is.
+
+    Parameters
+    ----------
+    file:
+        Path to the Rust source file.
+    updates:
+        Mapping of constant name -> new string literal content (WITHOUT
+        surrounding quotes).
+    """
     path = Path(file)
-    if not path.is_file():
-        raise FileNotFoundError(f"Rust source file not found: {path}")
-
-    # Always treat new_value as a string; callers can pass ints, etc.
-    new_value = str(new_value)
-
-    text = path.read_text(encoding="utf-8")
-
-    # Regex explanation:
-    #
-    # (?m)               - multiline mode (^ and $ match per line)
-    # ^\s*               - optional leading spaces at the start of the line
-    # pub\s+const\s+     - `pub const` with flexible spaces
-    # {const_name}       - the constant name (escaped)
-    # \s*:\s*&'?static?\s*str
-    #   or \s*:\s*&str   - we allow `&str` or `&'static str`
-    # \s*=\s*"           - `= "`
-    # (?P<value>[^"]*)   - the old value (anything up to the closing quote)
-    # ";                 - closing quote and semicolon
-    pattern = re.compile(
-        rf"""(?m)
-            ^
-            (?P<prefix>\s*pub\s+const\s+{re.escape(const_name)}\s*:\s*&(?:'static\s*)?str\s*=\s*")
-            (?P<value>[^"]*)
-            (?P<suffix>"\s*;)
-            """,
-        re.VERBOSE,
-    )
+    try:
+        text = path.read_text(encoding="utf-8")
+    except (FileNotFoundError, IsADirectoryError):
+        raise FileNotFoundError(f"Rust source file not found: {path}") from None
+
+    # Always treat values as strings; callers can pass ints, etc.
+    new_values = {name: str(value) for name, value in updates.items()}
+    seen: set[str] = set()
 
     def _repl(match: re.Match) -> str:
-        # We ignore the old value and inject new_value between prefix and suffix
-        return f"{match.group('prefix')}{new_value}{match.group('suffix')}"
+        name = match.group("name")
+        if name not in new_values:
+            return match.group(0)
+        seen.add(name)
+        # We ignore the old value and inject the new one between prefix and suffix
+        return f"{match.group('prefix')}{new_values[name]}{match.group('suffix')}"
 
-    new_text, count = pattern.subn(_repl, text)
+    new_text = _RUST_CONST_RE.sub(_repl, text)
 
-    if count == 0:
+    missing = [name for name in new_values if name not in seen]
+    if missing:
         # Nothing matched – likely a format change or wrong const name.
         raise Exception(
-            f"Failed to update {const_name} in {path} "
-            f'(matching `pub const {const_name}: &str = "...";` not found)'
+            f"Failed to update {', '.join(missing)} in {path} "
+            f'(matching `pub const NAME: &str = "...";` not found)'
         )
-    path.write_text(new_text, encoding="utf-8")
+    utils.write_text_if_changed(path, new_text, current=text)
 
 
 def get_contract_address(
@@ -83,12 +130,34 @@ def get_contract_address(
     Reads a contract address from contracts.yaml and returns it as a
     normalized hex string.
     """
-    data = utils.load_yaml(contracts_yaml)
-    val = data.get("ecosystem_contracts").get(field)
-    if not val:
-        raise SystemExit(f"{field} not found in {contracts_yaml}")
-    address = utils.normalize_hex(val, length=40)
-    return address
+    return get_contract_addresses(contracts_yaml, [field])[field]
+
+
+def get_contract_addresses(
+    contracts_yaml: Path,
+    fields: Iterable[str],
+) -> dict[str, str]:
+    """
+    Reads several contract addresses from contracts.yaml in a single pass
+    and returns them as normalized hex strings, keyed by field name.
+
+    The file is scanned as an event stream and reading stops once every
+    field has been seen.
+    """
+    wanted = set(fields)
+    values: dict[str, object] = {}
+    for keys, val in utils.iter_yaml_scalars(contracts_yaml):
+        if len(keys) == 2 and keys[0] == "ecosystem_contracts" and keys[1] in wanted:
+            values[keys[1]] = val
+            if len(values) == len(wanted):
+                break
+    addresses: dict[str, str] = {}
+    for field in fields:
+        val = values.get(field)
+        if not val:
+            raise SystemExit(f"{field} not found in {contracts_yaml}")
+        addresses[field] = utils.normalize_hex(val, length=40)
+    return addresses
 
 
 def update_chain_config_yaml(
@@ -96,22 +165,27 @@ def update_chain_config_yaml(
     *,
     contracts_yaml: str | Path,
     wallets_yaml: str | Path,
+    addresses: Optional[Mapping[str, str]] = None,
 ) -> None:
+    """
+    Writes contract addresses and operator keys into a chain config.
+
+    `addresses` may carry the `CHAIN_CONFIG_CONTRACTS` already read from
+    `contracts_yaml` (see `get_contract_addresses`), so callers updating
+    several configs from one chain don't re-read the file.
+    """
     yaml_path = Path(yaml_path)
 
     # Load config YAML
-    with yaml_path.open("r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+    config = utils.load_yaml(yaml_path)
 
     # Update contract addresses
-    config["genesis"]["bridgehub_address"] = get_contract_address(
-        contracts_yaml,
-        "bridgehub_proxy_addr",
-    )
-    config["genesis"]["bytecode_supplier_address"] = get_contract_address(
-        contracts_yaml,
-        "l1_bytecodes_supplier_addr",
-    )
+    if addresses is None:
+        addresses = get_contract_addresses(contracts_yaml, CHAIN_CONFIG_CONTRACTS)
+    config["genesis"]["bridgehub_address"] = addresses["bridgehub_proxy_addr"]
+    config["genesis"]["bytecode_supplier_address"] = addresses[
+        "l1_bytecodes_supplier_addr"
+    ]
 
     mapping = {
         "blob_operator": "operator_commit_sk",
@@ -132,14 +206,7 @@ def update_chain_config_yaml(
         pk = utils.normalize_hex(pk_raw, length=64)
         config["l1_sender"][yaml_key] = pk
 
-    with yaml_path.open("w", encoding="utf-8") as f:
-        yaml.safe_dump(
-            config,
-            f,
-            default_flow_style=False,
-            sort_keys=False,
-        )
-        f.write("\n")  # keep POSIX newline
+    utils.dump_yaml(yaml_path, config)
 
 
 def update_vk_hash(
@@ -153,38 +220,27 @@ def update_vk_hash(
     vk_hash = utils.extract_vk_hash(vk_hash_file)
     text = rust_file.read_text(encoding="utf-8")
 
-    const_name = f"V{proving_version}_VK_HASH"
-    new_const = f'    const {const_name}: &\'static str =\n        "{vk_hash}";'
-
-    update_pattern = re.compile(
-        rf'(^[ \t]*const\s+{re.escape(const_name)}\s*:\s*&\'static\s*str\s*=\s*\n[ \t]*")([^"]*)("\s*;)',
-        flags=re.MULTILINE,
+    # One scan finds both the constant to update and the append position
+    all_consts = list(_VK_HASH_CONST_RE.finditer(text))
+    target = next(
+        (m for m in all_consts if m.group("version") == proving_version),
+        None,
     )
-
-    # Use \g<1> and \g<3> to avoid \10 ambiguity when vk_hash starts with digits.
-    new_text, n = update_pattern.subn(rf"\g<1>{vk_hash}\g<3>", text, count=1)
-    if n == 1:
-        rust_file.write_text(new_text, encoding="utf-8")
+    if target is not None:
+        new_text = text[: target.start("hash")] + vk_hash + text[target.end("hash") :]
+        utils.write_text_if_changed(rust_file, new_text, current=text)
         return
 
-    all_consts = list(
-        re.finditer(
-            r"""
-            ^[ \t]*const\s+V\d+_VK_HASH\s*:\s*&'static\s*str\s*=\s*\n
-            [ \t]*"[^"]*"\s*;
-            """,
-            text,
-            re.VERBOSE | re.MULTILINE,
-        )
-    )
-
     if all_consts:
         last = all_consts[-1]
         insert_pos = last.end()
-        text = text[:insert_pos] + "\n" + new_const + text[insert_pos:]
+        new_const = _VK_HASH_CONST_TEMPLATE.format(
+            version=proving_version, vk_hash=vk_hash
+        )
+        new_text = text[:insert_pos] + "\n" + new_const + text[insert_pos:]
     else:
         raise SystemExit(
             f"No existing VK hash constants found in {rust_file} to edit or append."
         )
 
-    rust_file.write_text(text, encoding="utf-8")
+    utils.write_text_if_changed(rust_file, new_text, current=text)
@@ -4,13 +4,8 @@ from time import perf_counter
 
 from lib.script_context import ScriptCtx
 import datetime as _dt
-from lib.log import setup_logger, get_console
-from lib.utils import require_env
-
-
-def _env_bool(name, default=False):
-    val = require_env(name, str(default))
-    return default if val is None else val.lower() in {"1", "true", "yes", "on"}
+from lib.log import flush_logs, setup_logger, get_console
+from lib.utils import env_bool, require_env
 
 
 def init_ctx(required_env) -> ScriptCtx:
@@ -23,7 +18,7 @@ def init_ctx(required_env) -> ScriptCtx:
     repo_dir = Path(require_env("REPO_DIR")).resolve()
     script_name = Path(sys.argv[0]).stem
     component = repo_dir.name
-    verbose = _env_bool("VERBOSE")
+    verbose = env_bool("VERBOSE")
 
     ts = _dt.datetime.now().strftime("%Y%m%d-%H%M%S")
     log_dir = workspace / ".logs" / component
@@ -47,6 +42,7 @@ def init_ctx(required_env) -> ScriptCtx:
 def run_script(script, *, required_env=()):
     _console = get_console()
     start = perf_counter()
+    ctx = None
     try:
         ctx = init_ctx(required_env=required_env)
 
@@ -56,7 +52,7 @@ def run_script(script, *, required_env=()):
             f"[dim]Workspace :[/] {ctx.workspace}\n[dim]Component :[/] {ctx.component}"
         )
 
-        if _env_bool("DRY_RUN"):
+        if env_bool("DRY_RUN"):
             _console.print("[yellow]⚠ DRY RUN enabled - no changes will be made[/]")
             _console.rule()
             return
@@ -68,16 +64,19 @@ def run_script(script, *, required_env=()):
         script(ctx)
 
     except KeyboardInterrupt:
+        flush_logs()
         _console.print("[red]⚡ Interrupted by user (Ctrl+C)[/]")
         sys.exit(130)
     except SystemExit:
         raise
     except Exception as e:
+        flush_logs()
         _console.print(f"[red]✘ Script error: {e!r}[/]")
         _console.print_exception()
         sys.exit(1)
     else:
         total = perf_counter() - start
+        flush_logs()
         _console.rule()
 
         if ctx is not None:
@@ -100,3 +99,8 @@ def run_script(script, *, required_env=()):
             _console.print("[red]⚠ No context initialized[/]")
 
         _console.rule()
+    finally:
+        # Commands left running in the background (only possible when the
+        # script failed) must not outlive it
+        if ctx is not None:
+            ctx.terminate_children()
@@ -1,6 +1,9 @@
+import atexit
+import queue
 import sys
 from pathlib import Path
 import logging
+import logging.handlers
 from lib import config
 
 from rich.console import Console
@@ -9,14 +12,32 @@ from rich.logging import RichHandler
 # One shared console
 _console = Console(file=sys.stdout)
 
+# (log_file, verbose) the logger was last configured with
+_logger_config: tuple[Path | None, bool] | None = None
+
+# Records are enqueued by the logging thread and rendered (Rich markup,
+# file writes) by a background listener, so chatty subprocesses don't
+# block on formatting.
+_log_queue: queue.Queue = queue.Queue()
+_listener: logging.handlers.QueueListener | None = None
+
 
 def get_console() -> Console:
     return _console
 
 
 def setup_logger(log_file: Path | None, verbose: bool) -> logging.Logger:
+    global _logger_config, _listener
     logger = logging.getLogger(config.LOGGER_NAME)
+    # Already configured identically: keep the existing handlers
+    if _logger_config == (log_file, verbose) and logger.handlers:
+        return logger
+
     logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    _stop_listener()
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
 
     # Console handler (Rich)
@@ -29,13 +50,44 @@ def setup_logger(log_file: Path | None, verbose: bool) -> logging.Logger:
         show_level=False,
     )
     console.setLevel(logging.DEBUG if verbose else logging.INFO)
-    logger.addHandler(console)
+    handlers: list[logging.Handler] = [console]
 
     # File handler
     if log_file:
-        fh = logging.FileHandler(log_file, encoding="utf-8")
+        # delay=True: the file is only created once something is logged
+        fh = logging.FileHandler(log_file, encoding="utf-8", delay=True)
         fh.setLevel(logging.DEBUG)
         fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
-        logger.addHandler(fh)
+        handlers.append(fh)
 
+    _listener = logging.handlers.QueueListener(
+        _log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+    _logger_config = (log_file, verbose)
     return logger
+
+
+def flush_logs() -> None:
+    """
+    Block until all queued log records have been written.
+
+    Call before printing to the console directly or reading the log file,
+    so output stays in order and the file is complete.
+    """
+    if _listener is not None:
+        _log_queue.join()
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # drains the queue
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(_stop_listener)
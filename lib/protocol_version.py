@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Final, Mapping
 
 
 # Protocol version v30.2
@@ -12,7 +14,7 @@ PROTOCOL_VERSION_CURRENT: str = PROTOCOL_V30_2
 PROTOCOL_VERSION_NEXT: str = PROTOCOL_V31_0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Toolchain:
     """Default versions associated with a protocol version."""
 
@@ -24,21 +26,24 @@ class Toolchain:
     yarn_version: str
 
 
-PROTOCOL_TOOLCHAINS: dict[str, Toolchain] = {
-    PROTOCOL_V30_2: Toolchain(
-        yarn_version="1.22",
-        execution_version="5",
-        proving_version="6",
-        anvil_version="1.5.1",
-        cast_forge_version="0.0.4",
-        cargo_version="1.89.0",
-    ),
-    PROTOCOL_V31_0: Toolchain(
-        yarn_version="1.22",
-        execution_version="5",  # TODO switch to 6 when supported
-        proving_version="6",  # TODO switch to 7 when supported
-        anvil_version="1.5.1",
-        cast_forge_version="1.3.5",
-        cargo_version="1.89.0",
-    ),
-}
+# Read-only: shared by every script importing this module
+PROTOCOL_TOOLCHAINS: Final[Mapping[str, Toolchain]] = MappingProxyType(
+    {
+        PROTOCOL_V30_2: Toolchain(
+            yarn_version="1.22",
+            execution_version="5",
+            proving_version="6",
+            anvil_version="1.5.1",
+            cast_forge_version="0.0.4",
+            cargo_version="1.89.0",
+        ),
+        PROTOCOL_V31_0: Toolchain(
+            yarn_version="1.22",
+            execution_version="5",  # TODO switch to 6 when supported
+            proving_version="6",  # TODO switch to 7 when supported
+            anvil_version="1.5.1",
+            cast_forge_version="1.3.5",
+            cargo_version="1.89.0",
+        ),
+    }
+)
@@ -1,21 +1,27 @@
 import contextlib
+import json
 import logging
 import os
 import shlex
+import shutil
 import subprocess
 import sys
-from collections import deque
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
 from time import perf_counter
 from typing import Iterable, Mapping, Optional, Union
-from lib.log import get_console
+from lib.log import flush_logs, get_console
 from lib import config
+from lib import utils
 
 
 logger = logging.getLogger(config.LOGGER_NAME)
 _console = get_console()
 
+# Max bytes read from a subprocess pipe at once
+_READ_CHUNK_SIZE: int = 64 * 1024
+
 
 @dataclass(slots=True)
 class ScriptCtx:
@@ -37,19 +43,37 @@ class ScriptCtx:
     sections_ok: int = field(default=0, init=False)
     sections_failed: int = field(default=0, init=False)
 
+    # Commands started by `sh` that haven't finished yet
+    _children: set[subprocess.Popen] = field(default_factory=set, init=False)
+    _terminating: bool = field(default=False, init=False)
+
     # ------------------------------------------------------------------ #
     # Sections
     # ------------------------------------------------------------------ #
 
     @contextlib.contextmanager
-    def section(self, title: str, expected: float | None = None):
+    def section(
+        self,
+        title: str,
+        expected: float | None = None,
+        prefetch: Iterable[Path] = (),
+    ):
         """
         Context manager: section with spinner + timing and optional expected time.
 
+        Files passed as `prefetch` are pulled into the page cache in the
+        background while the section runs (useful for large inputs of a
+        subprocess, like the CRS file).
+
         Example:
             with ctx.section("Build wrapper", expected=20):
                 ctx.sh("cargo run --release --bin wrapper_generator")
         """
+        prefetch = list(prefetch)
+        if prefetch:
+            threading.Thread(
+                target=utils.prefetch_files, args=(prefetch,), daemon=True
+            ).start()
         self.sections_total += 1
         label = f"{title} (≈{expected:.0f}s)" if expected is not None else title
         # Header
@@ -68,6 +92,8 @@ class ScriptCtx:
                 duration = perf_counter() - start
                 self.sections_ok += 1
                 self._log_section_result(title, duration, expected, success=True)
+            finally:
+                flush_logs()
 
     def _log_section_result(
         self,
@@ -93,6 +119,23 @@ class ScriptCtx:
     # Paths / env
     # ------------------------------------------------------------------ #
 
+    def cargo_env(self) -> dict[str, str]:
+        """
+        Extra environment for cargo invocations: RUSTC_WRAPPER=sccache (cache
+        in `workspace/.sccache`) when sccache is installed, so rebuilds across
+        runs and repos reuse artifacts.
+
+        Values already set in the environment win. The job count is left to
+        cargo, which already honours CPU affinity and cgroup quotas.
+        """
+        env: dict[str, str] = {}
+        if "RUSTC_WRAPPER" not in os.environ and shutil.which("sccache"):
+            env["RUSTC_WRAPPER"] = "sccache"
+            env["SCCACHE_DIR"] = os.environ.get(
+                "SCCACHE_DIR", str(self.workspace / ".sccache")
+            )
+        return env
+
     def sh(
         self,
         cmd: Union[str, Iterable[str]],
@@ -100,11 +143,14 @@ class ScriptCtx:
         cwd: Optional[Path | str] = None,
         env: Optional[Mapping[str, str]] = None,
         print_command: Optional[bool] = True,
-    ) -> None:
+        capture_stdout: bool = False,
+    ) -> Optional[str]:
         """
         Run a command safely.
         - If cmd is a string, it is split shell-style (no shell=True).
         - If cmd is an iterable, it is used directly as argv.
+        - With capture_stdout, stdout is returned instead of logged (stderr
+          is still logged).
         """
         # Normalize command → argv
         if isinstance(cmd, str):
@@ -139,28 +185,157 @@ class ScriptCtx:
                 cwd=str(cwd_path),
                 env=merged_env,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
+                stderr=subprocess.PIPE if capture_stdout else subprocess.STDOUT,
+                bufsize=0,
             )
         except FileNotFoundError:
             self.logger.error(f"Executable not found when running: {argv[0]!r}")
             raise SystemExit(1)
-
-        assert proc.stdout is not None
-        for line in proc.stdout:
-            self.logger.log(level, line.rstrip("\n"))
-
-        rc = proc.wait()
+        self._children.add(proc)
+        captured: list[bytes] = []
+        try:
+            if capture_stdout:
+                # Drained in a thread so neither pipe can fill up and block
+                reader = threading.Thread(
+                    target=lambda: captured.append(proc.stdout.read()), daemon=True
+                )
+                reader.start()
+                self._stream_output(proc.stderr, level)
+                reader.join()
+                proc.stdout.close()
+            else:
+                self._stream_output(proc.stdout, level)
+            rc = proc.wait()
+        finally:
+            self._children.discard(proc)
         if rc != 0:
+            if self._terminating:
+                # Stopped by `terminate_children`, the script is failing anyway
+                raise subprocess.CalledProcessError(rc, argv)
             self.logger.error(f"command in {cwd_path} failed with exit code {rc}")
             self._tail_last_lines()
             raise subprocess.CalledProcessError(rc, argv)
+        if capture_stdout:
+            return b"".join(captured).decode("utf-8", errors="replace")
+        return None
+
+    def cargo_build(
+        self,
+        args: str,
+        *,
+        cwd: Optional[Path | str] = None,
+        env: Optional[Mapping[str, str]] = None,
+    ) -> dict[str, Path]:
+        """
+        Run `cargo build <args>` and return the executables it produced,
+        keyed by binary name.
+
+        Paths come from cargo's own JSON messages, so a `build.target-dir`
+        in .cargo/config.toml or CARGO_TARGET_DIR is taken into account.
+
+        Example:
+            bins = ctx.cargo_build("--release --bin wrapper", cwd=wrapper_path)
+            ctx.sh(f"{bins['wrapper']} --help")
+        """
+        out = self.sh(
+            f"cargo build --message-format=json-render-diagnostics {args}",
+            cwd=cwd,
+            env=env,
+            capture_stdout=True,
+        )
+        executables: dict[str, Path] = {}
+        for line in (out or "").splitlines():
+            if not line.startswith("{"):
+                continue
+            message = json.loads(line)
+            if message.get("reason") == "compiler-artifact" and message.get(
+                "executable"
+            ):
+                executables[message["target"]["name"]] = Path(message["executable"])
+        return executables
+
+    def cargo_build_bin(
+        self,
+        args: str,
+        *,
+        cwd: Optional[Path | str] = None,
+        env: Optional[Mapping[str, str]] = None,
+    ) -> Path:
+        """
+        Like `cargo_build`, for a package with a single binary whose name
+        the caller does not need to know (the equivalent of `cargo run -p`).
+
+        Example:
+            cli = ctx.cargo_build_bin("--release -p cli", cwd=airbender_dir)
+        """
+        executables = self.cargo_build(args, cwd=cwd, env=env)
+        if len(executables) != 1:
+            raise SystemExit(
+                f"Expected one binary from `cargo build {args}`, "
+                f"got: {', '.join(sorted(executables)) or 'none'}"
+            )
+        return next(iter(executables.values()))
+
+    def terminate_children(self, timeout: float = 10.0) -> None:
+        """
+        Stop commands still running from `sh`, e.g. a background build when
+        the script fails, so they don't outlive the script (holding CPU and
+        cargo's target-dir lock).
+        """
+        self._terminating = True
+        procs = [proc for proc in self._children if proc.poll() is None]
+        for proc in procs:
+            self.logger.debug(f"Terminating {proc.args[0]} (pid {proc.pid})")
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def _stream_output(self, pipe, level: int) -> None:
+        assert pipe is not None
+        # Drain the pipe in large chunks (fewer syscalls than line-buffered
+        # reads) but log one record per line, carrying a partial last line
+        # over to the next read. Splitting on b"\n" is safe for UTF-8, it
+        # never occurs inside a multi-byte sequence.
+        fd = pipe.fileno()
+        pending = b""
+        while chunk := os.read(fd, _READ_CHUNK_SIZE):
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                self.logger.log(level, _decode_line(line))
+        if pending:
+            self.logger.log(level, _decode_line(pending))
+        pipe.close()
 
     def _tail_last_lines(self, n: int = 20) -> None:
+        flush_logs()
         if not self.log_file or not self.log_file.exists():
             return
         print(f"── last {n} log lines ─────────────────────────")
-        with self.log_file.open(encoding="utf-8") as f:
-            for line in deque(f, maxlen=n):
-                sys.stdout.write(line)
+        sys.stdout.write(_read_tail(self.log_file, n))
         print("──────────────────────────────────────────────")
+
+
+def _decode_line(line: bytes) -> str:
+    return line.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def _read_tail(path: Path, n: int, chunk_size: int = 8192) -> str:
+    """
+    Return the last `n` lines of a file, reading backwards from the end
+    in fixed-size chunks so the cost doesn't grow with the file size.
+    """
+    with path.open("rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b""
+        # n + 1 newlines guarantee n complete lines (the last one may be unterminated)
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return "".join(lines[-n:])
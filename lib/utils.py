@@ -1,24 +1,71 @@
 import hashlib
-import gzip
 import contextlib
+import copy
+import functools
+import json
 import re
 import shutil
 import os
+import socket
 import subprocess
+import tempfile
+import threading
 import time
-from typing import Optional
-import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+import urllib.parse
 from pathlib import Path
-import yaml
 from shutil import which
-from packaging.specifiers import SpecifierSet
-from packaging.version import Version
 import logging
 from lib import config
 
+# yaml, packaging, gzip and urllib.request are imported on first use: not
+# every script needs them and they add noticeably to startup time
+if TYPE_CHECKING:
+    from packaging.version import Version
+
 
 logger = logging.getLogger(config.LOGGER_NAME)
 
+# Chunk size for streamed downloads and file compression
+_IO_CHUNK_SIZE: int = 4 * 1024 * 1024
+
+# Downloads at least this large are split into parallel Range requests
+_PARALLEL_DOWNLOAD_MIN_SIZE: int = 64 * 1024 * 1024
+_PARALLEL_DOWNLOAD_WORKERS: int = 8
+
+# VK hash in the @dev comment of a generated verifier contract
+_VK_HASH_RE = re.compile(r"hash of (0x[0-9a-fA-F]{64})")
+# Bytes of the verifier searched before falling back to the whole file
+_VK_HASH_HEAD_SIZE: int = 8 * 1024
+
+# Plain YAML scalars resolved to ints / null by the safe loader
+_HEX_INT_RE = re.compile(r"0x[0-9a-fA-F_]+")
+_DEC_INT_RE = re.compile(r"[-+]?(0|[1-9][0-9_]*)")
+_YAML_NULLS = frozenset({"", "~", "null", "Null", "NULL"})
+
+# First dotted version in `<cmd> --version` output
+_CMD_VERSION_RE = re.compile(r"\d+\.\d+(\.\d+)?")
+
+
+@functools.cache
+def _yaml():
+    """
+    Import PyYAML and return (yaml, Loader, Dumper), preferring the
+    libyaml-backed C loader/dumper and falling back to pure Python.
+    """
+    import yaml
+
+    try:
+        from yaml import CSafeDumper as Dumper, CSafeLoader as Loader
+    except ImportError:  # PyYAML built without libyaml
+        from yaml import SafeDumper as Dumper, SafeLoader as Loader
+
+        logger.warning(
+            "PyYAML has no libyaml bindings; using the slower pure-Python loader"
+        )
+    return yaml, Loader, Dumper
+
 
 def require_env(name: str, default: str = None) -> str:
     """
@@ -32,6 +79,44 @@ def require_env(name: str, default: str = None) -> str:
     return val
 
 
+def env_bool(name: str, default: bool = False) -> bool:
+    """
+    Return an environment variable as a flag: "1", "true", "yes" or "on"
+    (any case) are true, anything else is false.
+
+    Example:
+        utils.env_bool("DRY_RUN")
+    """
+    return require_env(name, str(default)).lower() in {"1", "true", "yes", "on"}
+
+
+def run_in_background(fn, /, *args, **kwargs) -> Future:
+    """
+    Run `fn(*args, **kwargs)` in a daemon thread and return a Future for
+    its result.
+
+    Daemon, unlike ThreadPoolExecutor workers, so a script that fails
+    while e.g. a large download is still running exits right away.
+
+    Example:
+        crs = utils.run_in_background(utils.download, url, dest)
+        ...
+        crs.result()  # re-raises any error from the download
+    """
+    future: Future = Future()
+
+    def _run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, daemon=True).start()
+    return future
+
+
 def require_path(env_var: str) -> Path:
     """
     Return a path resolved from an environment variable or a default inside the workspace.
@@ -45,15 +130,50 @@ def require_path(env_var: str) -> Path:
     return Path(val).resolve()
 
 
-def require_cmds(tools: dict[str, str]) -> None:
+def require_cmds(tools: dict[str, str], *, cache_file: Optional[Path] = None) -> None:
     """
     Ensure required command-line tools are available with correct versions.
+
+    With `cache_file`, versions are remembered across runs keyed by the
+    tool's resolved binary (path, mtime, size), so `--version` is only run
+    again after the tool was reinstalled. rustup proxies (cargo) and version
+    manager shims (corepack, volta, asdf, ...) are always probed: their
+    version depends on the active toolchain, not the binary.
     """
     missing = [t for t in tools if which(t) is None]
     if missing:
         raise SystemExit(f"Missing required tools: {', '.join(missing)}")
+
+    cached: dict = {}
+    if cache_file is not None and cache_file.is_file():
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        except ValueError:
+            cached = {}
+    keys = {tool: _cmd_cache_key(tool) for tool in tools}
+    from packaging.version import Version
+
+    def probe(tool: str) -> "Version":
+        entry = cached.get(tool)
+        if keys[tool] is not None and entry and entry.get("key") == keys[tool]:
+            return Version(entry["version"])
+        return get_cmd_version(tool)
+
+    # Probes are independent subprocesses: run them concurrently
+    with ThreadPoolExecutor(max_workers=len(tools) or 1) as pool:
+        versions = dict(zip(tools, pool.map(probe, tools)))
+
+    if cache_file is not None:
+        for tool, version in versions.items():
+            if keys[tool] is not None:
+                cached[tool] = {"key": keys[tool], "version": str(version)}
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        write_text_if_changed(cache_file, json.dumps(cached, indent=2) + "\n")
+
+    from packaging.specifiers import SpecifierSet
+
     for tool, constraint in tools.items():
-        version = get_cmd_version(tool)
+        version = versions[tool]
         spec = SpecifierSet(constraint)
         if version not in spec:
             raise SystemExit(
@@ -62,25 +182,226 @@ def require_cmds(tools: dict[str, str]) -> None:
         logger.info(f"Found {tool} {version} ✔")
 
 
+def _cmd_cache_key(tool: str) -> Optional[list]:
+    """Identity of the binary behind `tool`, or None if it can't be cached."""
+    found = which(tool)
+    path = os.path.realpath(found)
+    rustup = which("rustup")
+    if rustup and os.path.samefile(path, rustup):
+        return None  # rustup proxy
+    if _is_version_shim(found, path):
+        return None
+    st = os.stat(path)
+    return [path, st.st_mtime_ns, st.st_size]
+
+
+def _is_version_shim(found: str, resolved: str) -> bool:
+    """
+    Whether `found` (as on PATH, `resolved` after symlinks) is a version
+    manager launcher that picks the real tool at run time: its own file
+    doesn't change when the version it runs does.
+    """
+    return (
+        # asdf, mise, pyenv, nodenv, ... (~/.asdf/shims/yarn)
+        os.path.basename(os.path.dirname(found)) == "shims"
+        or os.path.basename(os.path.dirname(resolved)) == "shims"
+        # corepack (node_modules/corepack/dist/yarn.js) and volta
+        or "corepack" in Path(resolved).parts
+        or os.path.basename(resolved) == "volta-shim"
+    )
+
+
+# Parsed YAML documents keyed by resolved path -> ((mtime_ns, size), data)
+_YAML_CACHE: dict[Path, tuple[tuple[int, int], dict]] = {}
+_YAML_CACHE_MAX: int = 128
+
+
 def load_yaml(path: Path) -> dict:
+    """
+    Load a YAML file, reusing the parsed document while the file is unchanged.
+
+    The cache is keyed by (mtime_ns, size), so any rewrite of the file is
+    picked up. Callers get a deep copy and may mutate the result freely.
+    """
+    path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"YAML file not found: {path}")
-    with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    resolved = path.resolve()
+    st = resolved.stat()
+    key = (st.st_mtime_ns, st.st_size)
+
+    cached = _YAML_CACHE.get(resolved)
+    if cached is not None and cached[0] == key:
+        return copy.deepcopy(cached[1])
+
+    data = _parse_yaml_bytes(resolved, resolved.read_bytes())
+
+    _YAML_CACHE.pop(resolved, None)
+    if len(_YAML_CACHE) >= _YAML_CACHE_MAX:
+        # Evict the oldest entry (dicts keep insertion order)
+        _YAML_CACHE.pop(next(iter(_YAML_CACHE)))
+    _YAML_CACHE[resolved] = (key, data)
+    return copy.deepcopy(data)
 
 
-def clean_dir(path: Path) -> Path:
+def _parse_yaml_bytes(path: Path, raw: bytes) -> dict:
+    """
+    Parse YAML content, going through the JSON cache in YAML_JSON_CACHE_DIR
+    when that variable is set.
+
+    Cache entries are named `<path digest>.<content digest>.json`, so an
+    edited file never hits a stale entry, and only the latest entry per
+    source file is kept.
+    """
+    yaml, loader, _ = _yaml()
+    cache_dir = os.environ.get("YAML_JSON_CACHE_DIR")
+    if not cache_dir:
+        return yaml.load(raw, Loader=loader) or {}
+
+    path_digest = hashlib.blake2b(str(path).encode(), digest_size=8).hexdigest()
+    content_digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+    cache_file = Path(cache_dir) / f"{path_digest}.{content_digest}.json"
+    if cache_file.is_file():
+        return json.loads(cache_file.read_bytes())
+
+    data = yaml.load(raw, Loader=loader) or {}
+    try:
+        dumped = json.dumps(data, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return data  # not representable in JSON (e.g. dates)
+    if json.loads(dumped) != data:
+        return data  # lossy round-trip (e.g. non-string keys)
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    for stale in cache_file.parent.glob(f"{path_digest}.*.json"):
+        stale.unlink(missing_ok=True)
+    tmp = cache_file.with_suffix(".tmp")
+    tmp.write_text(dumped, encoding="utf-8")
+    tmp.replace(cache_file)  # atomic move
+    return data
+
+
+def dump_yaml(path: Path, data: dict) -> None:
+    """Write a YAML document in block style, preserving key order."""
+    yaml, _, dumper = _yaml()
+    text = yaml.dump(
+        data,
+        Dumper=dumper,
+        default_flow_style=False,
+        sort_keys=False,
+    )
+    # Serialize in memory and write once; keep POSIX newline
+    write_text_if_changed(Path(path), text + "\n")
+
+
+def write_text_if_changed(
+    path: Path, text: str, *, current: Optional[str] = None
+) -> bool:
+    """
+    Atomically write `text` to `path` unless the file already holds it.
+
+    `current` may be passed when the caller has already read the file.
+    Skipping no-op writes keeps the mtime stable, so mtime-keyed caches
+    and incremental builds stay valid on re-runs.
+
+    Symlinks are written through (the link itself is kept), and new files
+    get the usual umask-based mode rather than mkstemp's 0600.
+
+    Returns True if the file was rewritten.
+    """
+    path = Path(os.path.realpath(path))
+    if current is None and path.is_file():
+        current = path.read_text(encoding="utf-8")
+    if current == text:
+        logger.debug(f"{path} unchanged, skipping write")
+        return False
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            os.chmod(tmp, 0o666 & ~_umask())
+        os.replace(tmp, path)  # atomic move
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+@functools.cache
+def _umask() -> int:
+    # os.umask can only be read by setting it; done once, the scripts never
+    # change it
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def clean_dir(path: Path, *, trash_dir: Optional[Path] = None) -> Path:
     """
     Remove a directory if it exists and recreate it empty.
 
+    With `trash_dir` (on the same filesystem, outside any tree the caller
+    walks afterwards) the old directory is moved there and deleted in the
+    background instead of before returning.
+
     Returns the resulting directory Path.
     """
-    if path.exists():
-        shutil.rmtree(path, ignore_errors=True)
-    path.mkdir(parents=True, exist_ok=True)
+    if trash_dir is not None:
+        _sweep_trash(Path(trash_dir))
+    if os.path.exists(path):
+        if trash_dir is None:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            _rmtree_in_background(path, trash_dir)
+    os.makedirs(path, exist_ok=True)
     return path
 
 
+# Trash directories already swept by this process
+_SWEPT_TRASH_DIRS: set[Path] = set()
+
+
+def _sweep_trash(trash_dir: Path) -> None:
+    """
+    Delete, in the background, whatever an earlier run left in `trash_dir`
+    (e.g. it was killed before its deletions finished). Done once per
+    process, before anything of this run is moved there.
+    """
+    if trash_dir in _SWEPT_TRASH_DIRS:
+        return
+    _SWEPT_TRASH_DIRS.add(trash_dir)
+    try:
+        leftovers = list(trash_dir.iterdir())
+    except FileNotFoundError:
+        return
+    for leftover in leftovers:
+        threading.Thread(
+            target=shutil.rmtree, args=(leftover,), kwargs={"ignore_errors": True}
+        ).start()
+
+
+def _rmtree_in_background(path: Path, trash_dir: Path) -> None:
+    """
+    Move a directory into `trash_dir` (a cheap rename) and delete it in a
+    background thread. The thread is non-daemon, so the interpreter waits
+    for pending deletions before exiting.
+    """
+    trash = Path(trash_dir) / f"{Path(path).name}-{os.getpid()}-{time.time_ns()}"
+    try:
+        trash.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(path, trash)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    threading.Thread(
+        target=shutil.rmtree, args=(trash,), kwargs={"ignore_errors": True}
+    ).start()
+
+
 def remove_dir(path: Path) -> Path:
     """
     Remove a directory if it exists.
@@ -94,12 +415,69 @@ def remove_dir(path: Path) -> Path:
 
 def cp(src: Path, dst: Path) -> None:
     """Copy a file"""
-    if not src.exists():
+    # Plain os.path on strings: this runs per file, no need for Path objects
+    src_s, dst_s = os.fspath(src), os.fspath(dst)
+    if not os.path.exists(src_s):
         raise FileNotFoundError(f"Required file does not exist: {src}")
+    os.makedirs(os.path.dirname(dst_s) or ".", exist_ok=True)
+    if os.path.isdir(dst_s):
+        dst_s = os.path.join(dst_s, os.path.basename(src_s))
+    # Opening dst for writing would truncate src too (same path or hardlink,
+    # e.g. from `link_or_cp`); shutil.copy2 refuses the same way
+    if os.path.exists(dst_s) and os.path.samefile(src_s, dst_s):
+        raise shutil.SameFileError(f"{src_s!r} and {dst_s!r} are the same file")
+    _copy_file_data(src_s, dst_s)
+    shutil.copystat(src_s, dst_s)  # same metadata as shutil.copy2
+    if not os.path.exists(dst_s):
+        raise FileNotFoundError(f"File not found after copy: {dst_s}")
+
+
+def link_or_cp(src: Path, dst: Path) -> None:
+    """
+    Hardlink `src` to `dst` (replacing it), falling back to `cp` when a link
+    isn't possible, e.g. across filesystems.
+
+    Only use this for files that are replaced rather than edited in place
+    afterwards (like `download` outputs), since both paths share the data.
+    """
+    src, dst = Path(src), Path(dst)
+    if not src.is_file():
+        raise FileNotFoundError(f"Required file does not exist: {src}")
+    if dst.is_dir():
+        dst = dst / src.name
+    if dst.exists() and os.path.samefile(src, dst):
+        return  # already linked (rename() would be a no-op and leave tmp)
     dst.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(src, dst)
-    if not dst.exists():
-        raise FileNotFoundError(f"File not found after copy: {dst}")
+    tmp = dst.with_name(f".{dst.name}.link")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        cp(src, dst)
+        return
+    os.replace(tmp, dst)  # atomic: dst is never missing
+
+
+def _copy_file_data(src: str, dst: str) -> None:
+    """
+    Copy file contents, preferring os.copy_file_range (in-kernel, and a
+    reflink on CoW filesystems such as btrfs/xfs), falling back to
+    shutil.copyfile (sendfile on Linux).
+    """
+    if hasattr(os, "copy_file_range"):
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            remaining = os.fstat(fin.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                else:
+                    return
+            except OSError:
+                pass  # e.g. EXDEV / ENOSYS / EOPNOTSUPP: use the portable path
+    shutil.copyfile(src, dst)
 
 
 def download(
@@ -109,7 +487,17 @@ def download(
     checksum: Optional[str] = None,
     checksum_algo: str = "sha256",
 ) -> None:
-    """Download file with optional checksum verification"""
+    """
+    Download file with optional checksum verification.
+
+    With `force=True` an existing file is revalidated with the server using
+    the ETag / Last-Modified stored in a `.etag` sidecar, and only fetched
+    again if it changed.
+
+    The file is written to a temp sibling and renamed into place without an
+    fsync: a crash can't leave a truncated `dest`, but the content isn't
+    guaranteed to be on disk. That's fine for re-downloadable artifacts.
+    """
     dest = Path(dest)
 
     if dest.exists() and not force:
@@ -117,22 +505,74 @@ def download(
 
     dest.parent.mkdir(parents=True, exist_ok=True)
     tmp = dest.with_suffix(dest.suffix + ".tmp")
+    validators_file = dest.with_suffix(dest.suffix + ".etag")
+
+    import urllib.error
+    import urllib.request
+
+    # Forced re-download of a file we already have: make it conditional on
+    # the validators the server sent last time
+    headers: dict[str, str] = {}
+    if dest.exists() and validators_file.is_file():
+        try:
+            validators = json.loads(validators_file.read_text(encoding="utf-8"))
+        except ValueError:
+            validators = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
 
     hasher = hashlib.new(checksum_algo) if checksum else None
 
     try:
-        with urllib.request.urlopen(url) as r:
+        # Probe with a one-byte range: servers that support ranges answer 206
+        # with the total size, others ignore it and send the whole body (200),
+        # which then is the download
+        request = urllib.request.Request(url, headers={**headers, "Range": "bytes=0-0"})
+        try:
+            r = urllib.request.urlopen(request)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                logger.debug(f"{dest} is up to date (HTTP 304)")
+                return
+            if e.code != 416:
+                raise
+            # Empty file: there is no byte 0 to probe, fetch it plainly
+            r = urllib.request.urlopen(urllib.request.Request(url, headers=headers))
+        with r:
             if r.status >= 400:
                 raise RuntimeError(f"HTTP {r.status} for URL: {url}")
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+            final_url = r.geturl()
+            ranges = r.status == 206
+            if ranges:
+                total = (r.headers.get("Content-Range") or "").rpartition("/")[2]
+                size = int(total) if total.isdigit() else 0
+            else:
+                _stream_to_file(r, tmp, hasher)
 
-            with tmp.open("wb") as f:
-                while True:
-                    chunk = r.read(1024 * 1024)  # 1 MB chunks
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    if hasher:
-                        hasher.update(chunk)
+        # If-Range: should the object change between requests, the server
+        # sends it whole (200) instead of a part of the new version
+        if etag and not etag.startswith("W/"):
+            if_range = {"If-Range": etag}
+        elif last_modified:
+            if_range = {"If-Range": last_modified}
+        else:
+            if_range = {}
+        if ranges and size >= _PARALLEL_DOWNLOAD_MIN_SIZE and if_range:
+            # Large files are fetched over several connections; a single TCP
+            # stream rarely saturates the link
+            _download_ranges(final_url, tmp, size, if_range)
+            if hasher:
+                with tmp.open("rb") as f:
+                    hasher = hashlib.file_digest(f, checksum_algo)
+        elif ranges:
+            with urllib.request.urlopen(final_url) as r:
+                etag = r.headers.get("ETag")
+                last_modified = r.headers.get("Last-Modified")
+                _stream_to_file(r, tmp, hasher)
 
         if hasher:
             digest = hasher.hexdigest()
@@ -141,13 +581,130 @@ def download(
                     f"Checksum mismatch for {url}: expected {checksum}, got {digest}"
                 )
 
-        tmp.replace(dest)  # atomic move
+        os.replace(tmp, dest)  # atomic move
+
+        if etag or last_modified:
+            validators_file.write_text(
+                json.dumps({"etag": etag, "last_modified": last_modified}),
+                encoding="utf-8",
+            )
+        else:
+            validators_file.unlink(missing_ok=True)
 
     except Exception:
         tmp.unlink(missing_ok=True)
         raise
 
 
+def _stream_to_file(response, path: Path, hasher) -> None:
+    """Write an HTTP response body to `path`, feeding `hasher` on the way."""
+    # Reuse one buffer and hand the same view to the file and the hasher
+    # instead of allocating a new bytes object per chunk
+    buf = memoryview(bytearray(_IO_CHUNK_SIZE))
+    with path.open("wb") as f:
+        while n := response.readinto(buf):
+            chunk = buf[:n]
+            f.write(chunk)
+            if hasher:
+                hasher.update(chunk)
+
+
+def _download_ranges(url: str, tmp: Path, size: int, if_range: dict[str, str]) -> None:
+    """
+    Download `size` bytes from `url` into `tmp` using parallel HTTP Range
+    requests, each writing its own slice of the preallocated file.
+
+    Parts run on daemon threads (see `run_in_background`), so a failing
+    script doesn't wait for the rest of a large download before exiting.
+    """
+    import urllib.request
+
+    part = -(-size // _PARALLEL_DOWNLOAD_WORKERS)  # ceil division
+
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Reserve the blocks up front: parts written out of order would
+        # otherwise leave the file fragmented
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            os.ftruncate(fd, size)
+
+        cancel = threading.Event()
+
+        def fetch(start: int) -> None:
+            end = min(start + part, size) - 1
+            request = urllib.request.Request(
+                url, headers={**if_range, "Range": f"bytes={start}-{end}"}
+            )
+            with urllib.request.urlopen(request) as r:
+                if r.status == 200:
+                    raise RuntimeError(f"{url} changed during the download")
+                if r.status != 206:
+                    raise RuntimeError(f"HTTP {r.status} for range request: {url}")
+                buf = memoryview(bytearray(_IO_CHUNK_SIZE))
+                pos = start
+                while n := r.readinto(buf):
+                    if cancel.is_set():
+                        return
+                    written = 0
+                    while written < n:
+                        written += os.pwrite(fd, buf[written:n], pos + written)
+                    pos += n
+            if pos != end + 1:
+                raise RuntimeError(
+                    f"Short read for bytes {start}-{end} of {url}: got {pos - start}"
+                )
+
+        parts = [run_in_background(fetch, start) for start in range(0, size, part)]
+        try:
+            for future in parts:
+                future.result()
+        except BaseException:
+            # Stop the other parts before their fd is closed under them
+            cancel.set()
+            wait(parts)
+            raise
+    finally:
+        os.close(fd)
+
+
+def prefetch_files(paths: Iterable[Path]) -> None:
+    """
+    Ask the kernel to start reading files into the page cache so a later
+    consumer (usually a subprocess) doesn't wait on cold disk reads.
+
+    Best effort: missing files and platforms without posix_fadvise are
+    silently skipped.
+    """
+    _fadvise_files(paths, "POSIX_FADV_WILLNEED")
+
+
+def evict_files(paths: Iterable[Path]) -> None:
+    """
+    Drop (clean) pages of files that won't be read again during this run
+    from the page cache, so large one-off inputs don't push out build
+    artifacts. Best effort, like `prefetch_files`.
+    """
+    _fadvise_files(paths, "POSIX_FADV_DONTNEED")
+
+
+def _fadvise_files(paths: Iterable[Path], advice: str) -> None:
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
 def extract_vk_hash(verifier_plonk_sol: Path) -> str:
     """
     Reads a .sol verifier file and extracts the VK hash from its @dev comment.
@@ -157,19 +714,36 @@ def extract_vk_hash(verifier_plonk_sol: Path) -> str:
     If output_path is provided (or default None), it writes to .tmp/vk_hash.txt.
     Returns the hash string.
     """
-    vk_hash_re = re.compile(r"hash of (0x[0-9a-fA-F]{64})")
-    if not verifier_plonk_sol.is_file():
-        raise FileNotFoundError(f"Verifier file not found: {verifier_plonk_sol}")
-    content = verifier_plonk_sol.read_text(encoding="utf-8")
-    match = vk_hash_re.search(content)
+    try:
+        f = verifier_plonk_sol.open("rb")
+    except (FileNotFoundError, IsADirectoryError):
+        raise FileNotFoundError(
+            f"Verifier file not found: {verifier_plonk_sol}"
+        ) from None
+    with f:
+        # The @dev comment sits at the top of the contract: search the head
+        # first and only read the rest of the file if it isn't there
+        head = f.read(_VK_HASH_HEAD_SIZE)
+        match = _VK_HASH_RE.search(head.decode("utf-8", errors="replace"))
+        if not match:
+            content = head + f.read()
+            match = _VK_HASH_RE.search(content.decode("utf-8", errors="replace"))
     if not match:
         raise RuntimeError(f"Could not find VK hash in {verifier_plonk_sol}")
     vk_hash = match.group(1)
     return vk_hash
 
 
-def get_cmd_version(cmd: str) -> Version:
-    _VERSION_RE = re.compile(r"\d+\.\d+(\.\d+)?")
+@functools.cache
+def get_cmd_version(cmd: str) -> "Version":
+    """
+    Return the version reported by `<cmd> --version`.
+
+    Cached per process: the installed tools don't change while a script
+    runs, so repeated checks of the same tool don't spawn it again.
+    """
+    from packaging.version import Version
+
     result = subprocess.run(
         [cmd, "--version"],
         capture_output=True,
@@ -177,7 +751,7 @@ def get_cmd_version(cmd: str) -> Version:
         check=True,
     )
 
-    match = _VERSION_RE.search(result.stdout)
+    match = _CMD_VERSION_RE.search(result.stdout)
     if not match:
         raise RuntimeError(
             f"Could not parse version from `{cmd} --version`: {result.stdout}"
@@ -186,6 +760,30 @@ def get_cmd_version(cmd: str) -> Version:
     return Version(match.group())
 
 
+def git_revision(path: Path) -> Optional[str]:
+    """
+    Return the commit checked out in the git repo at `path`, or None when
+    it isn't a git checkout or has uncommitted changes to tracked files
+    (the revision wouldn't describe the sources then).
+    """
+    try:
+        head = subprocess.run(
+            ["git", "-C", str(path), "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "-C", str(path), "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return None if dirty else head
+
+
 def normalize_hex(value: str | int, length: int | None = None) -> str:
     if isinstance(value, str):
         return value.strip()
@@ -197,14 +795,39 @@ def normalize_hex(value: str | int, length: int | None = None) -> str:
 
 
 def gzip_file(src: Path, *, dst: Path | None = None, keep_src: bool = False) -> Path:
-    """Gzip a file with optional compression level and option to keep the source file."""
+    """
+    Gzip a file with option to keep the source file.
+
+    Uses pigz (multi-threaded) when it is on PATH, the gzip module otherwise.
+    Like `download`, the result is renamed into place without an fsync.
+    """
     if dst is None:
         dst = src.with_suffix(f"{src.suffix}.gz")  # e.g. state.json -> state.json.gz
+    import gzip
+
     tmp = dst.with_suffix(f"{dst.suffix}.tmp")
     # Stream-compress to a temp file, then atomically replace.
-    with src.open("rb") as fin, gzip.open(tmp, "wb") as fout:
-        shutil.copyfileobj(fin, fout)
-    tmp.replace(dst)
+    pigz = which("pigz")
+    try:
+        if pigz:
+            # Parallel gzip, same compression level as the gzip module default
+            with tmp.open("wb") as fout:
+                subprocess.run(
+                    [pigz, "-9", "-c", "-p", str(os.cpu_count() or 1), str(src)],
+                    stdout=fout,
+                    check=True,
+                )
+        else:
+            with (
+                src.open("rb") as fin,
+                tmp.open("wb", buffering=_IO_CHUNK_SIZE) as raw,
+                gzip.GzipFile(filename=src.name, mode="wb", fileobj=raw) as fout,
+            ):
+                shutil.copyfileobj(fin, fout, length=_IO_CHUNK_SIZE)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, dst)
     if not keep_src:
         try:
             src.unlink()
@@ -218,14 +841,31 @@ def anvil_dump_state(
     *,
     l1_state_file: Path,
     compress: bool = True,
+    startup_timeout: float = 30.0,
 ):
     """
     Run Anvil (with --dump-state) for the duration of the block.
 
+    Anvil listens on the host/port of `config.ANVIL_DEFAULT_URL`; the block
+    is entered as soon as it accepts connections.
+
     Usage:
         with ctx.anvil_dump_state(l1_state_file=server_l1_state_file):
             ... do stuff while Anvil is running ...
     """
+    anvil_url = urllib.parse.urlsplit(config.ANVIL_DEFAULT_URL)
+    host = anvil_url.hostname or "localhost"
+    port = anvil_url.port or 8545
+    # The readiness probe below can't tell which process is listening: a
+    # leftover node on the port would be taken for the new Anvil
+    try:
+        socket.create_connection((host, port), timeout=0.1).close()
+    except OSError:
+        pass
+    else:
+        raise SystemExit(
+            f"{host}:{port} is already in use (another Anvil still running?)"
+        )
     proc = subprocess.Popen(
         [
             "anvil",
@@ -236,18 +876,36 @@ def anvil_dump_state(
             "--disable-block-gas-limit",
             "--dump-state",
             str(l1_state_file),
+            "--port",
+            str(port),
         ],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
         text=True,
     )
-    time.sleep(2)
 
-    if proc.poll() not in (None, 0):
-        raise SystemExit(
-            f"Failed to start Anvil (exit {proc.returncode}); "
-            f"state file: {l1_state_file}"
-        )
+    # Wait until Anvil accepts connections instead of sleeping a fixed time
+    deadline = time.monotonic() + startup_timeout
+    while True:
+        if proc.poll() is not None:
+            raise SystemExit(
+                f"Failed to start Anvil (exit {proc.returncode}); "
+                f"state file: {l1_state_file}"
+            )
+        try:
+            socket.create_connection((host, port), timeout=0.1).close()
+            if proc.poll() is None:
+                break
+            continue  # exited meanwhile: reported at the top of the loop
+        except OSError:
+            if time.monotonic() > deadline:
+                proc.kill()
+                proc.wait()
+                raise SystemExit(
+                    f"Anvil did not start listening on {host}:{port} "
+                    f"within {startup_timeout:.0f}s"
+                )
+            time.sleep(0.05)
 
     try:
         yield proc
@@ -278,7 +936,89 @@ def anvil_dump_state(
             logger.info(f"Compressed state -> {gz_path}")
 
 
-def addresses_from_wallets_yaml(data: dict) -> set[str]:
+def json_rpc_batch(url: str, calls: list[tuple[str, list]]) -> list:
+    """
+    Send `(method, params)` calls to a JSON-RPC endpoint as a single batch
+    request and return their results in call order.
+
+    Batches are answered with HTTP 200 even if some calls failed, so every
+    entry is checked and the first error raises.
+    """
+    import urllib.request
+
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload, separators=(",", ":")).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as r:
+        responses = json.load(r)
+    if not isinstance(responses, list):  # the batch itself was rejected
+        raise RuntimeError(f"JSON-RPC batch to {url} failed: {responses}")
+
+    by_id = {resp.get("id"): resp for resp in responses}
+    results = []
+    for i, (method, _) in enumerate(calls):
+        resp = by_id.get(i)
+        if resp is None:
+            raise RuntimeError(f"No response to JSON-RPC call {method} (id {i})")
+        if "error" in resp:
+            raise RuntimeError(f"JSON-RPC call {method} failed: {resp['error']}")
+        results.append(resp.get("result"))
+    return results
+
+
+def iter_yaml_scalars(path: Path) -> Iterator[tuple[tuple, Any]]:
+    """
+    Yield `(keys, value)` for every scalar value in a YAML file, where
+    `keys` is the tuple of mapping keys leading to it (None for sequence
+    items), straight from the parser event stream.
+
+    No document is constructed, and callers may stop early once they have
+    what they need. Plain scalars are resolved like the safe loader would
+    for the types used in our configs: null → None, `0x...` / decimal → int;
+    everything else is returned as a string.
+    """
+    yaml, loader, _ = _yaml()
+    # One [is_mapping, next_is_key, last_key] entry per open collection
+    stack: list[list] = []
+    for event in yaml.parse(Path(path).read_bytes(), Loader=loader):
+        if isinstance(event, yaml.CollectionEndEvent):
+            stack.pop()
+            continue
+        if not isinstance(event, yaml.NodeEvent):
+            continue
+        parent = stack[-1] if stack else None
+        is_key = parent is not None and parent[0] and parent[1]
+        if parent is not None and parent[0]:
+            parent[1] = not parent[1]
+        if isinstance(event, yaml.ScalarEvent):
+            if is_key:
+                parent[2] = event.value
+            elif parent is not None:
+                yield tuple(entry[2] for entry in stack), _resolve_scalar(event)
+        elif isinstance(event, yaml.CollectionStartEvent):
+            stack.append([isinstance(event, yaml.MappingStartEvent), True, None])
+
+
+def _resolve_scalar(event) -> Any:
+    value = event.value
+    # implicit[0]: plain scalar without a tag, subject to type resolution
+    if event.implicit[0]:
+        if value in _YAML_NULLS:
+            return None
+        if _HEX_INT_RE.fullmatch(value):
+            return int(value.replace("_", ""), 16)
+        if _DEC_INT_RE.fullmatch(value):
+            return int(value.replace("_", ""))
+    return value
+
+
+def wallet_addresses(path: Path) -> set[str]:
     """
     wallets.yaml format:
         name:
@@ -288,20 +1028,12 @@ def addresses_from_wallets_yaml(data: dict) -> set[str]:
     Return all address values as 0x-prefixed hex strings.
     Handles both YAML strings and ints (0x... parsed as int).
     """
-    addrs: set[str] = set()
-
-    for name, entry in data.items():
-        if not isinstance(entry, dict):
-            continue
-
-        addr = entry.get("address")
-        if isinstance(addr, str):
-            addrs.add(addr.strip())
-        elif isinstance(addr, int):
-            # Ethereum address: 20 bytes → 40 hex chars
-            addrs.add(f"0x{addr:040x}")
-
-    return addrs
+    # Ethereum address: 20 bytes → 40 hex chars
+    return {
+        normalize_hex(value, length=40)
+        for keys, value in iter_yaml_scalars(path)
+        if len(keys) == 2 and keys[1] == "address" and value is not None
+    }
 
 
 def replace_with_symlink(target: Path, source: Path) -> None:
@@ -15,15 +15,16 @@ def script(ctx: ScriptCtx) -> None:
     with ctx.section("Download ZKsync OS binary", expected=20):
         asset_name = "multiblock_batch.bin"
         asset_url = f"{zksync_os_url}/releases/download/{zksync_os_tag}/{asset_name}"
-        output_file = ctx.workspace / asset_name
-        utils.download(asset_url, output_file)
+        # Kept per tag; re-runs only revalidate it with the server (ETag)
+        output_file = ctx.workspace / "zksync-os" / zksync_os_tag / asset_name
+        utils.download(asset_url, output_file, force=True)
 
     # ------------------------------------------------------------------ #
-    # Copy binary into repository
+    # Copy binary into repository (hardlinked when on the same filesystem)
     # ------------------------------------------------------------------ #
-    with ctx.section("Copy binary to repository", expected=5):
+    with ctx.section("Copy binary to repository", expected=1):
         target = ctx.repo_dir / "multiblock_batch.bin"
-        utils.cp(output_file, target)
+        utils.link_or_cp(output_file, target)
 
 
 if __name__ == "__main__":
@@ -13,7 +13,11 @@ Steps:
 - Stop Anvil and dump the new zkos-l1-state.json
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 from packaging.version import Version
 
 from lib.script_context import ScriptCtx
@@ -24,77 +28,202 @@ from lib import config
 from lib.protocol_version import (
     PROTOCOL_TOOLCHAINS,
     PROTOCOL_VERSION_NEXT,
+    Toolchain,
 )
 
 
+# Parsed once; protocol versions are compared as packaging Versions
+_PROTOCOL_VERSION_NEXT = Version(PROTOCOL_VERSION_NEXT)
+
+# Build and dependency directories never containing ecosystem configs
+_WALK_SKIP_DIRS = frozenset({".git", "node_modules", "target", "cache", "out"})
+
+
+@dataclass(frozen=True, slots=True)
+class ServerEnv:
+    """Inputs resolved once from the environment and shared by all steps."""
+
+    era_contracts_path: Path
+    zksync_era_path: Path
+    protocol_version: str
+    # protocol_version parsed once for comparisons
+    version: Version
+    toolchain: Toolchain
+    # Executables as reported by cargo, set once built ("Build zkstack CLI",
+    # "Build deposit generator"); the generator runs directly for every chain
+    zkstack_bin: Optional[Path] = None
+    deposit_generator_bin: Optional[Path] = None
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def _walk(root: Path) -> Iterator[tuple[str, list[str]]]:
+    """
+    Yield (dirpath, filenames) under `root`, without following symlinks and
+    skipping the (large) directories in `_WALK_SKIP_DIRS`.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _WALK_SKIP_DIRS]
+        yield dirpath, filenames
+
+
+def _find_files(root: Path, name: str) -> list[Path]:
+    """Find files called `name` under `root`."""
+    return [
+        Path(dirpath, name) for dirpath, filenames in _walk(root) if name in filenames
+    ]
+
+
+def _is_newer_than(output: Path, inputs: Iterable[Path | str]) -> bool:
+    """Whether `output` exists and is newer than every existing file in `inputs`."""
+    try:
+        output_mtime = output.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    for path in inputs:
+        try:
+            if os.stat(path).st_mtime_ns >= output_mtime:
+                return False
+        except FileNotFoundError:
+            continue
+    return True
+
+
 # ---------------------------------------------------------------------------
 # Funding logic
 # ---------------------------------------------------------------------------
-def fund_accounts(ctx: ScriptCtx, ecosystem_dir: Path) -> None:
+def fund_accounts(ctx: ScriptCtx, ecosystem_dir: Path) -> dict[str, Path]:
     """
     Approximate port of the bash funding logic:
     - Find all wallets.yaml
     - For each, extract addresses and send 100 ETH
-    - Then fund two (hardcoded) rich wallets with 9000 ETH each
+    - Then fund the rich wallets from config with 9000 ETH each
+
+    Returns the chains/<chain>/configs/wallets.yaml files found, keyed by
+    chain name.
     """
 
     if not ecosystem_dir.is_dir():
         ctx.fail(f"Ecosystem dir not found: {ecosystem_dir}")
 
-    wallets_files = list(ecosystem_dir.rglob("wallets.yaml"))
+    wallets_files = _find_files(ecosystem_dir, "wallets.yaml")
     if not wallets_files:
         ctx.fail(f"No wallets.yaml found under {ecosystem_dir}")
 
+    # Reads overlap on threads; files are logged in discovery order
     all_addrs: set[str] = set()
-    for wf in wallets_files:
-        data = utils.load_yaml(wf)
-        addrs = utils.addresses_from_wallets_yaml(data)
+    with ThreadPoolExecutor(max_workers=min(8, len(wallets_files))) as pool:
+        per_file = pool.map(utils.wallet_addresses, wallets_files)
+    for wf, addrs in zip(wallets_files, per_file):
         if addrs:
             ctx.logger.debug(f"Found {len(addrs)} addresses in {wf}")
             all_addrs.update(addrs)
 
-    rpc_url: str = config.ANVIL_DEFAULT_URL
-
-    # Fund each address
+    # Every address gets 100 ETH, then the rich wallets get 9000 ETH each;
+    # all balances are set with a single JSON-RPC batch request
     ctx.logger.debug(f"Funding {len(all_addrs)} addresses with 100 ETH each...")
-    amount_100eth = hex(100 * 10**18)
-    for addr in sorted(all_addrs):
-        ctx.sh(
-            f"cast rpc anvil_setBalance {addr} {amount_100eth} --rpc-url {rpc_url}",
-            print_command=False,
-        )
-
-    # Two large transfers between rich wallets
-    ctx.logger.debug("Funding two rich wallets with 9000 ETH each...")
-    amount_9000eth = hex(9000 * 10**18)
-    ctx.sh(
-        f"cast rpc anvil_setBalance 0xa61464658afeaf65cccaafd3a512b69a83b77618 {amount_9000eth} --rpc-url {rpc_url}",
-        print_command=False,
-    )
-    ctx.sh(
-        f"cast rpc anvil_setBalance 0x36615cf349d7f6344891b1e7ca7c72883f5dc049 {amount_9000eth} --rpc-url {rpc_url}",
-        print_command=False,
+    ctx.logger.debug(
+        f"Funding {len(config.ANVIL_RICH_WALLETS)} rich wallets with 9000 ETH each..."
     )
+    calls = [
+        ("anvil_setBalance", [addr, config.ANVIL_WALLET_BALANCE]) for addr in all_addrs
+    ]
+    calls += [
+        ("anvil_setBalance", [addr, config.ANVIL_RICH_WALLET_BALANCE])
+        for addr in config.ANVIL_RICH_WALLETS
+    ]
+    utils.json_rpc_batch(config.ANVIL_DEFAULT_URL, calls)
+
+    chains_dir = ecosystem_dir / "chains"
+    return {
+        wf.parents[1].name: wf
+        for wf in wallets_files
+        if wf.parent.name == "configs" and wf.parents[2] == chains_dir
+    }
+
+
+# ---------------------------------------------------------------------------
+# Build steps
+# ---------------------------------------------------------------------------
+def yarn_install(ctx: ScriptCtx, path: Path) -> None:
+    """
+    Run `yarn install` in `path`, unless node_modules was installed after
+    the last change to yarn.lock or any (workspace) package.json.
+    """
+    manifests = [
+        path / "yarn.lock",
+        path / "package.json",
+        *path.glob("*/package.json"),
+    ]
+    if _is_newer_than(path / "node_modules" / ".yarn-integrity", manifests):
+        ctx.logger.info(f"Dependencies in {path} are up to date, skipping yarn install")
+        return
+    ctx.sh("yarn install", cwd=path)
+
+
+def build_foundry_contracts(ctx: ScriptCtx, contracts_path: Path) -> None:
+    """
+    Run `yarn build:foundry` in da-contracts and l1-contracts concurrently:
+    the two projects compile independently.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        builds = [
+            pool.submit(ctx.sh, "yarn build:foundry", cwd=contracts_path / project)
+            for project in ("da-contracts", "l1-contracts")
+        ]
+    # Both builds have finished here; surface the first failure
+    for build in builds:
+        build.result()
+
+
+def check_chain_configs(
+    ctx: ScriptCtx,
+    env: ServerEnv,
+    ecosystem_name: str,
+    chains: list[str],
+) -> None:
+    """Fail fast on missing config templates, before minutes of builds."""
+    protocol_base = ctx.repo_dir / "local-chains" / env.protocol_version
+    missing_configs = [
+        path
+        for path in (
+            protocol_base / "default" / "config.yaml",
+            *(
+                protocol_base / ecosystem_name / f"chain_{chain}.yaml"
+                for chain in chains
+            ),
+        )
+        if not path.is_file()
+    ]
+    if missing_configs:
+        raise SystemExit(
+            "Missing chain config(s): " + ", ".join(map(str, missing_configs))
+        )
 
 
 def init_ecosystem(
     ctx: ScriptCtx,
+    env: ServerEnv,
     ecosystem_name: str,
     chains: list[str],
 ) -> None:
-    era_contracts_path = utils.require_path("ERA_CONTRACTS_PATH")
-    zksync_era_path = utils.require_path("ZKSYNC_ERA_PATH")
-    protocol_version = utils.require_env("PROTOCOL_VERSION")
+    era_contracts_path = env.era_contracts_path
+    zksync_era_path = env.zksync_era_path
+    protocol_version = env.protocol_version
 
-    zkstack_bin = zksync_era_path / "zkstack_cli" / "target" / "release" / "zkstack"
+    zkstack_bin = env.zkstack_bin
     ecosystems_dir = ctx.workspace / "ecosystems"
     ecosystem_dir = ctx.workspace / "ecosystems" / ecosystem_name
     protocol_base = ctx.repo_dir / "local-chains" / protocol_version
     default_base = protocol_base / "default"
     base = protocol_base / ecosystem_name
 
+    if zkstack_bin is None or not os.access(zkstack_bin, os.X_OK):
+        raise SystemExit(f"zkstack binary not found or not executable: {zkstack_bin}")
+
     with ctx.section(f"Initialize {ecosystem_name} ecosystem", expected=120):
-        utils.clean_dir(ecosystem_dir)
+        utils.clean_dir(ecosystem_dir, trash_dir=ctx.workspace / ".trash")
         ctx.sh(
             f"""
                 {zkstack_bin}
@@ -126,7 +255,7 @@ def init_ecosystem(
             cwd=ecosystem_dir,
         )
         # Remove default era chain (non zksync-os)
-        utils.clean_dir(ecosystem_dir / "chains")
+        utils.clean_dir(ecosystem_dir / "chains", trash_dir=ctx.workspace / ".trash")
 
         for chain in chains:
             ctx.sh(
@@ -158,7 +287,13 @@ def init_ecosystem(
             # Fund accounts
             # ------------------------------------------------------------------ #
             ctx.logger.info("Funding accounts...")
-            fund_accounts(ctx, ecosystem_dir)
+            chain_wallets = fund_accounts(ctx, ecosystem_dir)
+            missing = [chain for chain in chains if chain not in chain_wallets]
+            if missing:
+                raise SystemExit(
+                    f"No wallets.yaml for chain(s) {', '.join(missing)} "
+                    f"under {ecosystem_dir / 'chains'}"
+                )
             # ------------------------------------------------------------------ #
             # Deploy L1 contracts via zkstack
             # ------------------------------------------------------------------ #
@@ -177,21 +312,25 @@ def init_ecosystem(
                     """,
                 cwd=ecosystem_dir,
             )
+            # Contract addresses per chain, read once and shared by every
+            # config update and the deposit generator
+            chain_addresses: dict[str, dict[str, str]] = {}
             for chain in chains:
                 # ------------------------------------------------------------------ #
                 # Update contract addresses and operator keys
                 # ------------------------------------------------------------------ #
                 ctx.logger.debug("Updating contract addresses...")
-                contracts_yaml = (
-                    ecosystem_dir / "chains" / chain / "configs" / "contracts.yaml"
-                )
-                chain_wallets_yaml = (
-                    ecosystem_dir / "chains" / chain / "configs" / "wallets.yaml"
+                chain_wallets_yaml = chain_wallets[chain]
+                contracts_yaml = chain_wallets_yaml.parent / "contracts.yaml"
+                addresses = edit_server.get_contract_addresses(
+                    contracts_yaml, edit_server.CHAIN_CONFIG_CONTRACTS
                 )
+                chain_addresses[chain] = addresses
                 edit_server.update_chain_config_yaml(
                     base / f"chain_{chain}.yaml",
                     contracts_yaml=contracts_yaml,
                     wallets_yaml=chain_wallets_yaml,
+                    addresses=addresses,
                 )
                 name_suffix = f"_{chain}" if ecosystem_name == "multi_chain" else ""
                 wallets_out = base / f"wallets{name_suffix}.yaml"
@@ -203,17 +342,14 @@ def init_ecosystem(
                 # Generate deposit transaction
                 # ------------------------------------------------------------------ #
                 ctx.logger.info("Generating L1 -> L2 deposit transaction...")
-                bridgehub_address = edit_server.get_contract_address(
-                    contracts_yaml,
-                    "bridgehub_proxy_addr",
-                )
+                bridgehub_address = addresses["bridgehub_proxy_addr"]
                 ctx.sh(
                     f"""
-                    cargo run --release --package zksync_os_generate_deposit --
+                    {env.deposit_generator_bin}
                     --bridgehub "{bridgehub_address}"
                     --chain-id {chain}
                     --amount 100
-                    """
+                    """,
                 )
                 if chain == config.GATEWAY_CHAIN_ID:
                     ctx.sh(
@@ -239,16 +375,12 @@ def init_ecosystem(
                     )
             # Update Default setup with information from the first chain in the list
             # TODO: temporarily we are reusing one of the chains from Multichain setup for the Default setup
-            contracts_yaml = (
-                ecosystem_dir / "chains" / chains[0] / "configs" / "contracts.yaml"
-            )
-            chain_wallets_yaml = (
-                ecosystem_dir / "chains" / chains[0] / "configs" / "wallets.yaml"
-            )
+            chain_wallets_yaml = chain_wallets[chains[0]]
             edit_server.update_chain_config_yaml(
                 default_base / "config.yaml",
-                contracts_yaml=contracts_yaml,
+                contracts_yaml=chain_wallets_yaml.parent / "contracts.yaml",
                 wallets_yaml=chain_wallets_yaml,
+                addresses=chain_addresses[chains[0]],
             )
 
 
@@ -257,8 +389,6 @@ def init_ecosystem(
 # ---------------------------------------------------------------------------
 def script(ctx: ScriptCtx) -> None:
     # Paths & constants
-    era_contracts_path: Path = utils.require_path("ERA_CONTRACTS_PATH")
-    zksync_era_path: Path = utils.require_path("ZKSYNC_ERA_PATH")
     protocol_version: str = utils.require_env("PROTOCOL_VERSION")
     try:
         toolchain = PROTOCOL_TOOLCHAINS[protocol_version]
@@ -266,6 +396,15 @@ def script(ctx: ScriptCtx) -> None:
         raise ValueError(
             f"Unsupported PROTOCOL_VERSION: {protocol_version}. Supported: {list(PROTOCOL_TOOLCHAINS.keys())}"
         )
+    env = ServerEnv(
+        era_contracts_path=utils.require_path("ERA_CONTRACTS_PATH"),
+        zksync_era_path=utils.require_path("ZKSYNC_ERA_PATH"),
+        protocol_version=protocol_version,
+        version=Version(protocol_version),
+        toolchain=toolchain,
+    )
+    era_contracts_path: Path = env.era_contracts_path
+    zksync_era_path: Path = env.zksync_era_path
     execution_version: str = toolchain.execution_version
     proving_version: str = toolchain.proving_version
     cast_forge_version: str = toolchain.cast_forge_version
@@ -283,68 +422,58 @@ def script(ctx: ScriptCtx) -> None:
             "cast": f"=={cast_forge_version}",
             "forge": f"=={cast_forge_version}",
             "cargo": f">={cargo_version}",
-        }
+        },
+        cache_file=ctx.workspace / ".cmd_versions.json",
     )
+    multi_chain_ids = ["6565", "6566"]
+    check_chain_configs(ctx, env, "multi_chain", multi_chain_ids)
 
     # TODO: remove this later, needs only for v31 for now
     # ------------------------------------------------------------------ #
     # Build contracts for zkstack (temporary)
     # ------------------------------------------------------------------ #
-    if Version(protocol_version) >= Version(PROTOCOL_VERSION_NEXT):
+    if env.version >= _PROTOCOL_VERSION_NEXT:
         zkstack_era_contracts_path: Path = zksync_era_path / "contracts"
         with ctx.section("Build contracts in zkstack", expected=120):
-            ctx.sh(
-                """
-                yarn install
-                """,
-                cwd=zkstack_era_contracts_path,
-            )
-            ctx.sh(
-                """
-                yarn build:foundry
-                """,
-                cwd=zkstack_era_contracts_path / "da-contracts",
-            )
-            ctx.sh(
-                """
-                yarn build:foundry
-                """,
-                cwd=zkstack_era_contracts_path / "l1-contracts",
-            )
+            yarn_install(ctx, zkstack_era_contracts_path)
+            build_foundry_contracts(ctx, zkstack_era_contracts_path)
+
+    # ------------------------------------------------------------------ #
+    # Start zkstack CLI build, overlapping the era-contracts build
+    # ------------------------------------------------------------------ #
+    # Started only after the zkstack contracts above are built, so it never
+    # sees them half-written. Always run: zkstack also depends on those
+    # contract artifacts and on crates across zksync-era, which only cargo
+    # tracks reliably; a no-op build takes a few seconds.
+    zkstack_build = utils.run_in_background(
+        ctx.cargo_build,
+        "--release --bin zkstack",
+        cwd=zksync_era_path / "zkstack_cli",
+        env=ctx.cargo_env(),
+    )
 
     # ------------------------------------------------------------------ #
     # Build contracts
     # ------------------------------------------------------------------ #
     with ctx.section("Build contracts", expected=120):
-        ctx.sh(
-            """
-            yarn install
-            """,
-            cwd=era_contracts_path,
-        )
-        ctx.sh(
-            """
-            yarn build:foundry
-            """,
-            cwd=era_contracts_path / "da-contracts",
-        )
-        ctx.sh(
-            """
-            yarn build:foundry
-            """,
-            cwd=era_contracts_path / "l1-contracts",
-        )
+        yarn_install(ctx, era_contracts_path)
+        build_foundry_contracts(ctx, era_contracts_path)
 
     # ------------------------------------------------------------------ #
-    # Build zkstack CLI
+    # Wait for zkstack CLI build
     # ------------------------------------------------------------------ #
-    with ctx.section("Build zkstack CLI", expected=100):
-        ctx.sh(
-            """
-            cargo build --release --bin zkstack
-            """,
-            cwd=zksync_era_path / "zkstack_cli",
+    with ctx.section("Build zkstack CLI", expected=20):
+        env = replace(env, zkstack_bin=zkstack_build.result()["zkstack"])
+
+    # ------------------------------------------------------------------ #
+    # Build L1 -> L2 deposit generator
+    # ------------------------------------------------------------------ #
+    with ctx.section("Build deposit generator", expected=60):
+        deposit_generator_bin = ctx.cargo_build_bin(
+            "--release --package zksync_os_generate_deposit",
+            env=ctx.cargo_env(),
         )
+        env = replace(env, deposit_generator_bin=deposit_generator_bin)
 
     # ------------------------------------------------------------------ #
     # Generate genesis.json
@@ -357,6 +486,7 @@ def script(ctx: ScriptCtx) -> None:
               --execution-version {execution_version}
             """,
             cwd=era_contracts_path / "tools" / "zksync-os-genesis-gen",
+            env=ctx.cargo_env(),
         )
 
     # TODO: currently single-chain setup is disabled, instead it is a symlink to one of the chains from Multi-chain setup
@@ -364,18 +494,18 @@ def script(ctx: ScriptCtx) -> None:
     # # ------------------------------------------------------------------ #
     # # Single-chain setup
     # # ------------------------------------------------------------------ #
-    # init_ecosystem(ctx, "default", ["6565"])
+    # init_ecosystem(ctx, env, "default", ["6565"])
 
     # ------------------------------------------------------------------ #
     # Multi-chain setup
     # ------------------------------------------------------------------ #
     # TODO: uncomment when gateway chain is supported in main server
-    init_ecosystem(ctx, "multi_chain", ["6565", "6566"])
-    # if Version(protocol_version) == Version(PROTOCOL_VERSION_CURRENT):
-    #     init_ecosystem(ctx, "multi_chain", ["6565", "6566"])
+    init_ecosystem(ctx, env, "multi_chain", multi_chain_ids)
+    # if env.version == Version(PROTOCOL_VERSION_CURRENT):
+    #     init_ecosystem(ctx, env, "multi_chain", ["6565", "6566"])
 
-    # if Version(protocol_version) >= Version(PROTOCOL_VERSION_NEXT):
-    #     init_ecosystem(ctx, "multi_chain", ["6565", "6566", config.GATEWAY_CHAIN_ID])
+    # if env.version >= _PROTOCOL_VERSION_NEXT:
+    #     init_ecosystem(ctx, env, "multi_chain", ["6565", "6566", config.GATEWAY_CHAIN_ID])
 
     # ------------------------------------------------------------------ #
     # Update VK hash in prover config
@@ -394,8 +524,9 @@ def script(ctx: ScriptCtx) -> None:
     # ------------------------------------------------------------------ #
     # Regenerate contracts.json
     # ------------------------------------------------------------------ #
-    with ctx.section("Regenerate contracts.json", expected=30):
-        ctx.sh("yarn install", cwd=era_contracts_path / "l1-contracts")
+    with ctx.section("Regenerate contracts.json", expected=10):
+        # l1-contracts dependencies come from the era-contracts workspace
+        # install in "Build contracts"
         ctx.sh(
             f"""
             yarn write-factory-deps-zksync-os
@@ -1,11 +1,37 @@
 #!/usr/bin/env python3
 
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
 from lib.script_context import ScriptCtx
 from lib.entry import run_script
 import lib.utils as utils
 import lib.config as config
 
 
+def vk_cache_file(
+    ctx: ScriptCtx, zkos_wrapper_path: Path, binary: Path
+) -> Optional[Path]:
+    """
+    Cache path for the SNARK VK generated from `binary`, the pinned CRS and
+    the zkos-wrapper revision; the VK is a pure function of those three.
+
+    None when the wrapper sources aren't a clean git checkout, since their
+    revision can't be trusted to identify the generator then.
+    """
+    revision = utils.git_revision(zkos_wrapper_path)
+    if revision is None:
+        return None
+    with binary.open("rb") as f:
+        binary_digest = hashlib.file_digest(f, "sha256").hexdigest()
+    key = hashlib.sha256(
+        f"{binary_digest}|{config.CRS_FILE_SHA256_CHECKSUM}|{revision}".encode()
+    ).hexdigest()
+    return ctx.workspace / "vk-cache" / f"{key}.json"
+
+
 def script(ctx: ScriptCtx) -> None:
     # ------------------------------------------------------------------ #
     # Tooling check
@@ -13,7 +39,8 @@ def script(ctx: ScriptCtx) -> None:
     utils.require_cmds(
         {
             "cargo": ">=1.89",
-        }
+        },
+        cache_file=ctx.workspace / ".cmd_versions.json",
     )
 
     # ------------------------------------------------------------------ #
@@ -22,44 +49,87 @@ def script(ctx: ScriptCtx) -> None:
     zkos_wrapper_path = utils.require_path("ZKOS_WRAPPER_PATH")
     zksync_os_tag = utils.require_env("ZKSYNC_OS_TAG")
     zksync_os_url = utils.require_env("ZKSYNC_OS_URL", config.ZKSYNC_OS_URL)
+    # Regenerate the SNARK VK even if one from the same inputs is cached
+    force_vk = utils.env_bool("FORCE_VK_GENERATION")
 
     # ------------------------------------------------------------------ #
-    # Download CRS (trusted setup) file
+    # Download ZKsync OS binary (multiblock_batch.bin) for given tag
     # ------------------------------------------------------------------ #
-    with ctx.section("Download CRS file", expected=30):
-        crs_path = ctx.workspace / "setup.key"
-        utils.download(
+    with ctx.section("Download ZKsync OS binary", expected=1):
+        asset_name = "multiblock_batch.bin"
+        asset_url = f"{zksync_os_url}/releases/download/{zksync_os_tag}/{asset_name}"
+        # Kept per tag; re-runs only revalidate it with the server (ETag)
+        output_file = ctx.workspace / "zksync-os" / zksync_os_tag / asset_name
+        utils.download(asset_url, output_file, force=True)
+
+    # A cached VK for these inputs makes the wrapper build and the CRS
+    # (multi-GB) unnecessary
+    vk_path = ctx.workspace / "snark_vk_expected.json"
+    vk_cached = vk_cache_file(ctx, zkos_wrapper_path, output_file)
+    reuse_vk = not force_vk and vk_cached is not None and vk_cached.is_file()
+    crs_path = ctx.workspace / "setup.key"
+
+    if not reuse_vk:
+        # -------------------------------------------------------------- #
+        # Start CRS (trusted setup) download, overlapping the wrapper build
+        # -------------------------------------------------------------- #
+        crs_download = utils.run_in_background(
+            utils.download,
             config.CRS_FILE_URL,
             crs_path,
             checksum=config.CRS_FILE_SHA256_CHECKSUM,
         )
 
-    # ------------------------------------------------------------------ #
-    # Download ZKsync OS binary (multiblock_batch.bin) for given tag
-    # ------------------------------------------------------------------ #
-    with ctx.section("Download ZKsync OS binary", expected=1):
-        asset_name = "multiblock_batch.bin"
-        asset_url = f"{zksync_os_url}/releases/download/{zksync_os_tag}/{asset_name}"
-        output_file = ctx.workspace / asset_name
-        utils.download(asset_url, output_file)
+        # -------------------------------------------------------------- #
+        # Build zkos-wrapper
+        # -------------------------------------------------------------- #
+        with ctx.section("Build zkos-wrapper", expected=120):
+            wrapper_bin = ctx.cargo_build(
+                "--bin wrapper --release",
+                cwd=zkos_wrapper_path,
+                env=ctx.cargo_env(),
+            )["wrapper"]
+
+        # -------------------------------------------------------------- #
+        # Wait for CRS (trusted setup) file
+        # -------------------------------------------------------------- #
+        with ctx.section("Download CRS file", expected=1):
+            crs_download.result()
 
     # ------------------------------------------------------------------ #
     # Generate SNARK VK using zkos-wrapper
     # ------------------------------------------------------------------ #
-    with ctx.section("Generate SNARK VK", expected=430):
-        vk_path = ctx.workspace / "snark_vk_expected.json"
-        if vk_path.is_file():
-            vk_path.unlink()
-        ctx.sh(
-            f"""
-            cargo run --bin wrapper --release -- \
-              generate-snark-vk
-              --input-binary {ctx.workspace / "multiblock_batch.bin"}
-              --trusted-setup-file {ctx.workspace / "setup.key"}
-              --output-dir {ctx.workspace}
-            """,
-            cwd=zkos_wrapper_path,
-        )
+    with ctx.section(
+        "Generate SNARK VK",
+        expected=1 if reuse_vk else 310,
+        prefetch=[] if reuse_vk else [crs_path, output_file],
+    ):
+        if reuse_vk:
+            ctx.logger.info(f"Inputs unchanged, reusing SNARK VK from {vk_cached}")
+            utils.cp(vk_cached, vk_path)
+        else:
+            if vk_path.is_file():
+                vk_path.unlink()
+            # Built above: run the binary directly, skipping cargo's checks
+            ctx.sh(
+                f"""
+                {wrapper_bin}
+                  generate-snark-vk
+                  --input-binary {output_file}
+                  --trusted-setup-file {crs_path}
+                  --output-dir {ctx.workspace}
+                """,
+                cwd=zkos_wrapper_path,
+                env=ctx.cargo_env(),
+            )
+            if vk_cached is not None:
+                # Via a temp file: an interrupted copy must not leave a
+                # truncated VK that later runs would reuse
+                tmp = vk_cached.with_name(f".{vk_cached.name}.tmp")
+                utils.cp(vk_path, tmp)
+                os.replace(tmp, vk_cached)
+    # Nothing below reads the (multi-GB) CRS or the binary again
+    utils.evict_files([output_file] if reuse_vk else [crs_path, output_file])
 
     # ------------------------------------------------------------------ #
     # Copy VK and generate verifier contracts
@@ -76,11 +146,13 @@ def script(ctx: ScriptCtx) -> None:
         utils.cp(ctx.workspace / "snark_vk_expected.json", target_vk_json)
 
         # Generate verifier contracts
-        ctx.sh(
-            "cargo run --bin zksync_verifier_contract_generator \
-                --release -- --variant zksync-os",
-            cwd=ctx.repo_dir / "tools" / "verifier-gen",
-        )
+        verifier_gen_path = ctx.repo_dir / "tools" / "verifier-gen"
+        verifier_gen_bin = ctx.cargo_build(
+            "--release --bin zksync_verifier_contract_generator",
+            cwd=verifier_gen_path,
+            env=ctx.cargo_env(),
+        )["zksync_verifier_contract_generator"]
+        ctx.sh(f"{verifier_gen_bin} --variant zksync-os", cwd=verifier_gen_path)
 
         # Copy generated contracts into l1-contracts
         verifiers_dir = (
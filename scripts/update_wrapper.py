@@ -12,19 +12,36 @@ def script(ctx: ScriptCtx) -> None:
     utils.require_cmds(
         {
             "cargo": ">=1.89",
-        }
+        },
+        cache_file=ctx.workspace / ".cmd_versions.json",
     )
 
     # ------------------------------------------------------------------ #
     with ctx.section("Building wrapper", expected=100):
-        ctx.sh("cargo run --release --bin wrapper_generator")
+        wrapper_generator_bin = ctx.cargo_build(
+            "--release --bin wrapper_generator", env=ctx.cargo_env()
+        )["wrapper_generator"]
+        ctx.sh(str(wrapper_generator_bin))
+
+    # Compile the test binary while the proof is generated: compilation only
+    # needs the generated wrapper sources, not the proof (cargo rebuilds
+    # anyway if the test embeds it)
+    test_env = {**ctx.cargo_env(), "RUST_MIN_STACK": "67108864"}
+    test_build = utils.run_in_background(
+        ctx.sh,
+        "cargo test --release --no-run all_layers_full_test",
+        env=test_env,
+    )
 
     # ------------------------------------------------------------------ #
     with ctx.section("Generating fibonacci SNARK proof", expected=350):
         airbender_dir = utils.require_path("ZKSYNC_AIRBENDER_PATH")
+        cli_bin = ctx.cargo_build_bin(
+            "--release -p cli", cwd=airbender_dir, env=ctx.cargo_env()
+        )
         ctx.sh(
             f"""
-            cargo run -p cli --release prove
+            {cli_bin} prove
               --bin examples/hashed_fibonacci/app.bin
               --input-file examples/hashed_fibonacci/input.txt
               --until final-proof
@@ -36,9 +53,10 @@ def script(ctx: ScriptCtx) -> None:
 
     # ------------------------------------------------------------------ #
     with ctx.section("Updating test data", expected=1780):
+        test_build.result()
         ctx.sh(
             "cargo test --release all_layers_full_test -- --nocapture",
-            env={"RUST_MIN_STACK": "67108864"},
+            env=test_env,
         )
 
 